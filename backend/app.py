@@ -1,68 +1,251 @@
-import json
-import random
+import atexit
+import os
+import time
+from urllib.parse import parse_qs
 import gevent
+import msgspec
+import numpy as np
+import orjson
 from gevent import spawn
+from gevent.event import Event
+from gevent.lock import Semaphore
+from gevent.queue import Queue, Full
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from flask_sockets import Sockets
+from geventwebsocket.websocket import Header, WebSocket
 from dotenv import load_dotenv
 
 from dsa.db_utils import DatabaseUtils
-from dsa.heap_utils import CabFinder
-from dsa.utils import calculate_distance, calculate_fare, is_point_on_path
+from dsa.fleet_state import FleetState
+from dsa.utils import calculate_distance, calculate_fare, is_point_on_segments
+from schemas import BookCabRequest, CabRegisterRequest, FindCabRequest, ViewportMessage
 
 # -----------------------------------------------------------------------------
 # INIT
 # -----------------------------------------------------------------------------
 load_dotenv()
 
+
+class OrjsonProvider(JSONProvider):
+    # jsonify() and request.get_json() go through orjson instead of json
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
-sockets = Sockets(app)        # WebSocket handler
+START_TIME = time.time_ns()
+
 db = DatabaseUtils("database.db")
+fleet = FleetState(db)        # live cab state; DB is written through
 
-clients = []                  # connected WS clients
-active_cab_targets = {}       # cab_id → movement target
+clients = {}                  # connected WS client → outbound queue
+viewports = {}                # WS client → (min_lat, min_lng, max_lat, max_lng)
+sim_wakeup = Event()          # set when a cab is given a movement target
+cabs_body = {"version": None, "etag": "", "body": b""}   # cached /api/cabs response
+
+CAB_STEP = 0.0002             # degrees moved per simulator tick
+TICK_SECONDS = 2              # simulator tick period
+ARRIVE_THRESHOLD = 0.00025    # degrees from target counted as arrived
+WS_OUTBOX_SIZE = 64           # queued frames before a client is dropped
+FLUSH_EVERY = 5               # simulator ticks between position writes
+WS_YIELD_EVERY = 256          # clients served between cooperative yields
+SHARE_BBOX_PAD = 0.01         # degrees of slack around a ride's box for the path test
+
+
+# -----------------------------------------------------------------------------
+# WEBSOCKET ROUTING
+# -----------------------------------------------------------------------------
+ws_routes = {}                # path → WS handler
+
+
+def websocket_route(path):
+    def decorator(handler):
+        ws_routes[path] = handler
+        return handler
+    return decorator
+
+
+class WebSocketMiddleware:
+    # GeventWebSocketWorker performs the upgrade and leaves the socket in
+    # wsgi.websocket; hand it straight to the handler without going through
+    # Flask's request/response cycle.
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        ws = environ.get("wsgi.websocket")
+        handler = ws_routes.get(environ.get("PATH_INFO"))
+        if ws is not None and handler is not None:
+            handler(ws)
+            return []
+        return self.wsgi_app(environ, start_response)
+
+
+app.wsgi_app = WebSocketMiddleware(app.wsgi_app)
 
 
 # -----------------------------------------------------------------------------
 # WS BROADCAST HELPERS
 # -----------------------------------------------------------------------------
-def ws_broadcast(message: dict):
-    dead = []
-    for ws in clients:
-        if ws.closed:
-            dead.append(ws)
-            continue
-        try:
-            ws.send(json.dumps(message))
-        except:
-            dead.append(ws)
+def ws_frame(message: dict):
+    # Encode and frame once for all clients: every peer gets the identical
+    # unmasked binary frame, so ws.send() would only redo the header and
+    # copy the payload again for each of them.
+    data = orjson.dumps(message)
+    return bytes(Header.encode_header(True, WebSocket.OPCODE_BINARY, b"", len(data), 0)) + data
+
+
+def ws_fanout(frame_for):
+    # Never block on a socket here: each client's own greenlet drains its
+    # outbox, so one slow peer cannot stall the simulator or API handlers.
+    # With many clients, yield now and then so their greenlets start sending
+    # while the rest are still being queued.
+    slow = []
+    for i, (ws, outbox) in enumerate(list(clients.items()), 1):
+        frame = frame_for(ws)
+        if frame is not None:
+            try:
+                outbox.put_nowait(frame)
+            except Full:
+                slow.append(ws)
+        if i % WS_YIELD_EVERY == 0:
+            gevent.sleep(0)
+
+    # Unregistering a client makes its writer close the socket
+    for ws in slow:
+        clients.pop(ws, None)
+        viewports.pop(ws, None)
+
 
-    for ws in dead:
-        clients.remove(ws)
+def ws_broadcast(message: dict):
+    frame = ws_frame(message)
+    ws_fanout(lambda ws: frame)
+
+
+def ws_broadcast_positions(updates: list):
+    message = {"type": "batch", "ts": time.time(), "updates": updates}
+    if not viewports:
+        return ws_broadcast(message)
+
+    # Clients that sent a viewport only get the cabs inside it; one frame
+    # is built per distinct viewport and shared by everyone watching it
+    everyone = ws_frame(message)
+    lat = np.fromiter((u["latitude"] for u in updates), dtype=np.float64, count=len(updates))
+    lng = np.fromiter((u["longitude"] for u in updates), dtype=np.float64, count=len(updates))
+    frames = {}
+
+    def frame_for(ws):
+        bbox = viewports.get(ws)
+        if bbox is None:
+            return everyone
+        if bbox not in frames:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            inside = np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng))
+            frames[bbox] = ws_frame({**message, "updates": [updates[i] for i in inside]}) if len(inside) else None
+        return frames[bbox]
+
+    ws_fanout(frame_for)
+
+
+def valid_bbox(bbox):
+    # min <= max on both axes; the comparisons also reject NaN
+    min_lat, min_lng, max_lat, max_lng = bbox
+    return min_lat <= max_lat and min_lng <= max_lng
+
+
+def parse_bbox(value):
+    # "min_lat,min_lng,max_lat,max_lng" from the query string, or None
+    parts = value.split(",")
+    if len(parts) != 4:
+        return None
+    try:
+        bbox = tuple(float(p) for p in parts)
+    except ValueError:
+        return None
+    return bbox if valid_bbox(bbox) else None
 
 
-def ws_broadcast_list(messages: list):
-    for msg in messages:
-        ws_broadcast(msg)
+def set_viewport(ws, raw):
+    # {"bbox": [min_lat, min_lng, max_lat, max_lng]} sets the viewport and
+    # {"bbox": null} removes it; anything else is ignored
+    try:
+        bbox = msgspec.json.decode(raw, type=ViewportMessage).bbox
+    except msgspec.DecodeError:
+        return
+    if bbox is None:
+        viewports.pop(ws, None)
+    elif valid_bbox(bbox):
+        viewports[ws] = bbox
 
 
 # -----------------------------------------------------------------------------
 # WEBSOCKET ENDPOINT
 # -----------------------------------------------------------------------------
-@sockets.route("/cab_location_updates")
+def ws_lock_writes(ws):
+    # Two greenlets write to each socket: ws_writer sends our frames, and
+    # the handler's ws.receive() answers PINGs and CLOSEs itself. Both go
+    # through ws.raw_write, so serialise it to keep frames from interleaving.
+    lock = Semaphore()
+    raw_write = ws.raw_write
+
+    def locked_write(data):
+        with lock:
+            raw_write(data)
+
+    ws.raw_write = locked_write
+
+
+def ws_writer(ws, outbox):
+    # Sleeps on the outbox until there is something to send. Once the client
+    # is unregistered for falling behind, close it so it can reconnect.
+    try:
+        while ws in clients:
+            ws.raw_write(outbox.get())
+        ws.close()
+    except Exception:
+        pass
+
+
+@websocket_route("/cab_location_updates")
 def cab_location_updates(ws):
     print("🟢 WS Connected")
-    clients.append(ws)
+    ws_lock_writes(ws)
+    outbox = Queue(maxsize=WS_OUTBOX_SIZE)
+    clients[ws] = outbox
+    writer = spawn(ws_writer, ws, outbox)
 
-    while not ws.closed:
-        gevent.sleep(0.1)
+    # Initial viewport may come as ?bbox=min_lat,min_lng,max_lat,max_lng
+    query = parse_qs(ws.environ.get("QUERY_STRING", ""))
+    bbox = parse_bbox(query["bbox"][0]) if "bbox" in query else None
+    if bbox:
+        viewports[ws] = bbox
 
-    print("🔴 WS Disconnected")
-    if ws in clients:
-        clients.remove(ws)
+    try:
+        # The only thing clients send is an optional viewport; the read
+        # also returns None as soon as the client goes away
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            set_viewport(ws, message)
+    except Exception:
+        pass
+    finally:
+        clients.pop(ws, None)
+        viewports.pop(ws, None)
+        writer.kill()
+        print("🔴 WS Disconnected")
 
 
 # -----------------------------------------------------------------------------
@@ -70,7 +253,16 @@ def cab_location_updates(ws):
 # -----------------------------------------------------------------------------
 @app.route("/api/cabs", methods=["GET"])
 def get_cabs():
-    return jsonify(db.get_all_cabs())
+    # Re-encode only when the fleet has changed since the last request; the
+    # start time in the ETag keeps a restarted server from matching old tags
+    if cabs_body["version"] != fleet.version:
+        cabs_body["body"] = orjson.dumps(fleet.all_cabs())
+        cabs_body["etag"] = "%d-%d" % (START_TIME, fleet.version)
+        cabs_body["version"] = fleet.version
+
+    response = app.response_class(cabs_body["body"], mimetype="application/json")
+    response.set_etag(cabs_body["etag"])
+    return response.make_conditional(request)
 
 
 # -----------------------------------------------------------------------------
@@ -78,22 +270,23 @@ def get_cabs():
 # -----------------------------------------------------------------------------
 @app.route("/api/cab_register", methods=["POST"])
 def cab_register():
-    data = request.json
-    required = ["cab_id", "name", "rto_number", "driver_name", "latitude", "longitude"]
-
-    if not all(k in data for k in required):
+    try:
+        data = msgspec.json.decode(request.get_data(), type=CabRegisterRequest)
+    except msgspec.DecodeError:
         return jsonify({"error": "Missing cab data"}), 400
 
     try:
-        db.add_cab(
-            data["cab_id"],
-            data["name"],
-            data["rto_number"],
-            data["driver_name"],
-            data["latitude"],
-            data["longitude"],
-            data.get("status", "Available"),
+        saved = fleet.add_cab(
+            data.cab_id,
+            data.name,
+            data.rto_number,
+            data.driver_name,
+            data.latitude,
+            data.longitude,
+            data.status,
         )
+        if not saved:
+            return jsonify({"error": "Could not save cab"}), 500
         return jsonify({"message": "Cab saved"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -104,123 +297,138 @@ def cab_register():
 # -----------------------------------------------------------------------------
 @app.route("/api/find_cab", methods=["POST"])
 def find_cab():
-    data = request.json
-    required = ["start_latitude", "start_longitude", "end_latitude", "end_longitude"]
-
-    if not all(k in data for k in required):
+    try:
+        data = msgspec.json.decode(request.get_data(), type=FindCabRequest)
+    except msgspec.DecodeError:
         return jsonify({"error": "Missing coordinates"}), 400
 
-    start_lat = data["start_latitude"]
-    start_lng = data["start_longitude"]
-    end_lat = data["end_latitude"]
-    end_lng = data["end_longitude"]
+    start_lat = data.start_latitude
+    start_lng = data.start_longitude
+    end_lat = data.end_latitude
+    end_lng = data.end_longitude
 
-    cabs = db.get_all_cabs()
-    nearest = CabFinder.find_nearest_cab(cabs, start_lat, start_lng, num_cabs=3)
+    nearest = fleet.nearest_available(start_lat, start_lng, k=3)
 
     if not nearest:
         return jsonify({"error": "No cabs available"}), 404
 
+    # Trip distance and fare do not depend on the cab
+    total_dist = calculate_distance(start_lat, start_lng, end_lat, end_lng)
+    fare = calculate_fare(total_dist)
+    total_m = total_dist * 1000
+
     results = []
     for cab, pickup_dist in nearest:
-        total_dist = calculate_distance(start_lat, start_lng, end_lat, end_lng)
-        fare = calculate_fare(total_dist)
-
         results.append({
             "cab": cab,
             "pickup_distance": pickup_dist * 1000,
-            "total_distance": total_dist * 1000,
+            "total_distance": total_m,
             "fare": fare,
             "status": cab["status"],
             "is_shared": False
         })
 
-    results.sort(key=lambda x: x["pickup_distance"])
-
     # Find potential shared rides
-    shared_rides = find_shared_ride(start_lat, start_lng, end_lat, end_lng)
+    shared_rides = find_shared_ride(start_lat, start_lng, end_lat, end_lng, total_dist)
     results.extend(shared_rides)
 
     return jsonify({"available_cabs": results})
 
 
 # -----------------------------------------------------------------------------
-# BOOK CAB
+# SHARED RIDE MATCHING
 # -----------------------------------------------------------------------------
-@app.route("/api/book_cab", methods=["POST"])
-def find_shared_ride(start_lat, start_lng, end_lat, end_lng):
+def find_shared_ride(start_lat, start_lng, end_lat, end_lng, new_ride_dist):
     potential_shared_rides = []
     active_rides = db.get_active_rides()
-
-    for ride in active_rides:
-        cab_id = ride['cab_id']
-        cab = next((c for c in db.get_all_cabs() if c["cab_id"] == cab_id), None)
+    if not active_rides:
+        return potential_shared_rides
+
+    # The new rider's trip is the same whichever ride it joins
+    # (e.g., 70% of the regular fare for a shared ride)
+    shared_fare = calculate_fare(new_ride_dist) * 0.7
+    new_ride_m = new_ride_dist * 1000
+
+    # The path of an active ride is simplified to a direct line between its
+    # source and destination (ideally from OSRM). Test the new rider's source
+    # and destination against every ride's line in one vectorized pass.
+    n = len(active_rides)
+    ride_start_lat = np.fromiter((r['start_latitude'] for r in active_rides), dtype=np.float64, count=n)
+    ride_start_lng = np.fromiter((r['start_longitude'] for r in active_rides), dtype=np.float64, count=n)
+    ride_end_lat = np.fromiter((r['end_latitude'] for r in active_rides), dtype=np.float64, count=n)
+    ride_end_lng = np.fromiter((r['end_longitude'] for r in active_rides), dtype=np.float64, count=n)
+
+    # A point on a ride's line lies inside the line's bounding box, so most
+    # rides are rejected with comparisons before any trig is done
+    min_lat = np.minimum(ride_start_lat, ride_end_lat) - SHARE_BBOX_PAD
+    max_lat = np.maximum(ride_start_lat, ride_end_lat) + SHARE_BBOX_PAD
+    min_lng = np.minimum(ride_start_lng, ride_end_lng) - SHARE_BBOX_PAD
+    max_lng = np.maximum(ride_start_lng, ride_end_lng) + SHARE_BBOX_PAD
+    candidates = np.flatnonzero(
+        (min_lat <= start_lat) & (start_lat <= max_lat) & (min_lng <= start_lng) & (start_lng <= max_lng)
+        & (min_lat <= end_lat) & (end_lat <= max_lat) & (min_lng <= end_lng) & (end_lng <= max_lng)
+    )
+    if not len(candidates):
+        return potential_shared_rides
+
+    a_lat, a_lng = ride_start_lat[candidates], ride_start_lng[candidates]
+    b_lat, b_lng = ride_end_lat[candidates], ride_end_lng[candidates]
+    on_path = (
+        is_point_on_segments(start_lat, start_lng, a_lat, a_lng, b_lat, b_lng)
+        & is_point_on_segments(end_lat, end_lng, a_lat, a_lng, b_lat, b_lng)
+    )
+
+    for i in candidates[np.flatnonzero(on_path)].tolist():
+        ride = active_rides[i]
+        cab = fleet.get(ride['cab_id'])
         if not cab or cab['status'] != 'Busy':
             continue
 
-        # Get the path of the active ride (simplified for now, ideally from OSRM)
-        # For now, we'll consider a direct line between source and destination of the active ride
-        active_ride_path = [
-            (ride['start_latitude'], ride['start_longitude']),
-            (ride['end_latitude'], ride['end_longitude'])
-        ]
-
-        # Check if new rider's source and destination are on the active ride's path
-        is_source_on_path = is_point_on_path(start_lat, start_lng, active_ride_path)
-        is_destination_on_path = is_point_on_path(end_lat, end_lng, active_ride_path)
-
-        if is_source_on_path and is_destination_on_path:
-            # Calculate new fare (e.g., 70% of original fare for shared ride)
-            original_total_dist = calculate_distance(ride['start_latitude'], ride['start_longitude'], ride['end_latitude'], ride['end_longitude'])
-            new_ride_dist = calculate_distance(start_lat, start_lng, end_lat, end_lng)
-            shared_fare = calculate_fare(new_ride_dist) * 0.7 # Example: 30% discount for shared
-
-            potential_shared_rides.append({
-                "cab": cab,
-                "pickup_distance": calculate_distance(start_lat, start_lng, cab['latitude'], cab['longitude']) * 1000,
-                "total_distance": new_ride_dist * 1000,
-                "fare": shared_fare,
-                "status": "Shared",
-                "is_shared": True,
-                "original_ride_id": ride['ride_id']
-            })
+        potential_shared_rides.append({
+            "cab": cab,
+            "pickup_distance": calculate_distance(start_lat, start_lng, cab['latitude'], cab['longitude']) * 1000,
+            "total_distance": new_ride_m,
+            "fare": shared_fare,
+            "status": "Shared",
+            "is_shared": True,
+            "original_ride_id": ride['ride_id']
+        })
     return potential_shared_rides
 
 
+# -----------------------------------------------------------------------------
+# BOOK CAB
+# -----------------------------------------------------------------------------
 @app.route("/api/book_cab", methods=["POST"])
 def book_cab():
-    data = request.json
-    required = ["cab_id", "start_latitude", "start_longitude", "end_latitude", "end_longitude"]
-
-    if not all(k in data for k in required):
+    try:
+        data = msgspec.json.decode(request.get_data(), type=BookCabRequest)
+    except msgspec.DecodeError:
         return jsonify({"error": "Missing booking data"}), 400
 
-    start_latitude = data["start_latitude"]
-    start_longitude = data["start_longitude"]
-    end_latitude = data["end_latitude"]
-    end_longitude = data["end_longitude"]
-    cab_id = data["cab_id"]
-    is_shared = data.get('is_shared', False)
+    start_latitude = data.start_latitude
+    start_longitude = data.start_longitude
+    end_latitude = data.end_latitude
+    end_longitude = data.end_longitude
+    cab_id = data.cab_id
+    is_shared = data.is_shared
 
-    cab = next((c for c in db.get_all_cabs() if c["cab_id"] == cab_id), None)
+    cab = fleet.get(cab_id)
     if not cab:
         return jsonify({"error": "Cab not found"}), 404
 
-    db.update_cab_status(cab_id, "Busy")
-    original_ride_id = data.get('original_ride_id', None)
+    fleet.update_status(cab_id, "Busy")
+    original_ride_id = data.original_ride_id
 
     if is_shared and original_ride_id:
         # Logic for shared ride booking (e.g., update existing ride, add new entry)
         # For now, we'll just add a new ride with shared status
-        db.add_ride(cab_id, s_lat, s_lng, e_lat, e_lng, True, status='on_trip')
+        db.add_ride(cab_id, start_latitude, start_longitude, end_latitude, end_longitude, True, status='on_trip')
     else:
-        db.add_ride(cab_id, s_lat, s_lng, e_lat, e_lng, False, status='on_trip')
+        db.add_ride(cab_id, start_latitude, start_longitude, end_latitude, end_longitude, False, status='on_trip')
 
-    active_cab_targets[cab_id] = {
-        "target_lat": s_lat,
-        "target_lng": s_lng,
-        "stage": "pickup"
-    }
+    fleet.set_target(cab_id, start_latitude, start_longitude)
+    sim_wakeup.set()
 
     return jsonify({"message": "Ride booked", "cab_id": cab_id, "status": "Enroute"})
 
@@ -230,13 +438,15 @@ def book_cab():
 # -----------------------------------------------------------------------------
 @app.route("/api/complete_ride/<int:cab_id>", methods=["GET"])
 def complete_ride(cab_id):
-    db.update_cab_status(cab_id, "Available")
+    fleet.update_status(cab_id, "Available")
     ride = db.get_ride_by_cab_id(cab_id)
 
     if ride:
-        db.update_cab_location(cab_id, ride["end_latitude"], ride["end_longitude"])
+        fleet.update_location(cab_id, ride["end_latitude"], ride["end_longitude"])
 
-    active_cab_targets.pop(cab_id, None)
+    # Finished rides are no longer candidates for sharing
+    db.complete_rides(cab_id)
+    fleet.clear_target(cab_id)
 
     ws_broadcast({
         "cab_id": cab_id,
@@ -251,54 +461,54 @@ def complete_ride(cab_id):
 # -----------------------------------------------------------------------------
 def simulate_cabs():
     print("🚗 Simulator running...")
+    tick = 0
+    next_tick = time.monotonic()
 
     while True:
+        # Nothing moves without a target: park until a booking arrives.
+        # Clear before checking, so a booking made after the check (even
+        # while flush() runs) leaves the event set and wait() returns.
+        sim_wakeup.clear()
+        if not fleet.has_targets():
+            fleet.flush()
+            sim_wakeup.wait()
+            next_tick = time.monotonic()
+
         try:
-            cabs = db.get_all_cabs()
-            updates = []
-
-            for cab in cabs:
-                cid = cab["cab_id"]
-                lat = float(cab["latitude"])
-                lng = float(cab["longitude"])
-                status = cab["status"]
-
-                # Moving to pickup destination
-                if cid in active_cab_targets:
-                    t = active_cab_targets[cid]
-                    tlat = float(t["target_lat"])
-                    tlng = float(t["target_lng"])
-
-                    dx = tlat - lat
-                    dy = tlng - lng
-                    dist = (dx * dx + dy * dy) ** 0.5
-
-                    if dist < 0.00025:
-                        db.update_cab_status(cid, "Arrived")
-                        active_cab_targets.pop(cid, None)
-
-                        ws_broadcast({"cab_id": cid, "status": "Arrived"})
-                    else:
-                        step = 0.0002
-                        lat += step * (dx / dist)
-                        lng += step * (dy / dist)
-                        db.update_cab_location(cid, lat, lng, status)
-
-                updates.append({
-                    "cab_id": cid,
-                    "latitude": lat,
-                    "longitude": lng,
-                    "status": status
-                })
-
-            ws_broadcast_list(updates)
+            moved, arrived = fleet.step_towards_targets(CAB_STEP, ARRIVE_THRESHOLD)
 
-        except Exception as e:
-            print("Simulation error:", e)
+            for row in arrived:
+                ws_broadcast({"cab_id": fleet.cab_ids[row], "status": "Arrived"})
 
-        gevent.sleep(2)
+            # Positions live in memory; write them every few ticks, but
+            # save arrivals straight away since they change status
+            tick += 1
+            if len(arrived) or tick % FLUSH_EVERY == 0:
+                fleet.flush()
+                gevent.sleep(0)   # let sockets run after the blocking commit
 
+            # One frame per tick, carrying only the cabs that changed; clients
+            # get the full fleet from /api/cabs
+            updates = fleet.positions(moved) + fleet.positions(arrived)
+            if updates:
+                ws_broadcast_positions(updates)
+
+        except Exception as e:
+            print("Simulation error:", e)
 
-# Start simulator
-spawn(simulate_cabs)
-print("🟢 Simulator thread started")
+        # Sleep until the next deadline so the tick's own work does not
+        # stretch the period
+        next_tick += TICK_SECONDS
+        delay = next_tick - time.monotonic()
+        if delay < 0:
+            print(f"⚠️ Simulator tick overran by {-delay:.3f}s")
+            next_tick -= delay
+            delay = 0
+        gevent.sleep(delay)
+
+
+# Start simulator (set CAB_SIM_MASTER=0 to serve the API without moving cabs)
+if os.environ.get("CAB_SIM_MASTER", "1") == "1":
+    atexit.register(fleet.flush)
+    spawn(simulate_cabs)
+    print("🟢 Simulator thread started")
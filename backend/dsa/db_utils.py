@@ -1,265 +1,449 @@
 import sqlite3
 import os
+import queue
+from contextlib import contextmanager
+from pathlib import Path
+from gevent.lock import Semaphore
+
+# ----------------------------------------------------
+# HOT-PATH STATEMENTS
+# ----------------------------------------------------
+# One fixed text per operation, so each connection's statement cache holds a
+# single prepared statement for it. A NULL status leaves the status unchanged.
+SQL_UPSERT_CAB = """
+    INSERT OR REPLACE INTO cabs (cab_id, name, rto_number, driver_name,
+                                 latitude, longitude, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_UPDATE_LOC = "UPDATE cabs SET latitude=?, longitude=?, status=COALESCE(?, status) WHERE cab_id=?"
+SQL_UPDATE_STATUS = "UPDATE cabs SET status=? WHERE cab_id=?"
+SQL_INSERT_RIDE = """
+    INSERT INTO rides (cab_id, user_start_x, user_start_y,
+                       user_end_x, user_end_y, shared, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
 
 class DatabaseUtils:
-    def __init__(self, db_path='../database.db'):
+    def __init__(self, db_path='../database.db', pool_size=4):
         self.db_path = db_path
+        # Idle connections are kept open so SQLite's page cache stays warm
+        # between calls instead of being rebuilt on every request/tick.
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        # All writes go through one connection, one at a time, so writers
+        # never fight over SQLite's database lock; readers use the pool.
+        self._write_conn = None
+        self._write_lock = Semaphore(1)
         self.initialize_db()
 
     # ----------------------------------------------------
     # THREAD-SAFE CONNECTION
     # ----------------------------------------------------
-    def connect(self):
+    def connect(self, readonly=False):
         try:
+            if readonly:
+                # Read-only handle: can never take the write lock
+                target = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            else:
+                target = self.db_path
+
             conn = sqlite3.connect(
-                self.db_path,
+                target,
+                uri=readonly,
                 check_same_thread=False,   # allow usage across threads
                 timeout=10                 # prevents "database is locked"
             )
-            conn.execute("PRAGMA journal_mode=WAL;")
+            if not readonly:
+                conn.execute("PRAGMA journal_mode=WAL;")
+                conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute("PRAGMA cache_size=-20000;")
             conn.execute("PRAGMA busy_timeout=5000;")
+            # Sort/index temporaries stay in RAM, and reads come straight
+            # from the OS page cache instead of being copied into SQLite's
+            conn.execute("PRAGMA temp_store=MEMORY;")
+            conn.execute("PRAGMA mmap_size=268435456;")
             return conn
         except sqlite3.Error as e:
             print("Database connection error:", e)
             return None
 
+    # ----------------------------------------------------
+    # POOLED CONNECTION
+    # ----------------------------------------------------
+    # Borrow a long-lived read-only connection; a new one is opened only when
+    # every pooled connection is already checked out. Writes use writer().
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self.connect(readonly=True)
+
+        try:
+            yield conn
+        finally:
+            if conn:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    # ----------------------------------------------------
+    # SHARED WRITER CONNECTION
+    # ----------------------------------------------------
+    @contextmanager
+    def writer(self):
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self.connect()
+            yield self._write_conn
+
+    def disconnect(self):
+        with self._write_lock:
+            if self._write_conn:
+                self._write_conn.close()
+                self._write_conn = None
+
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
     # ----------------------------------------------------
     # CREATE TABLES
     # ----------------------------------------------------
     def initialize_db(self):
-        conn = self.connect()
-        if not conn:
-            return False
+        with self.writer() as conn:
+            if not conn:
+                return False
+
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS cabs (
+                        cab_id INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        rto_number TEXT NOT NULL,
+                        driver_name TEXT NOT NULL,
+                        latitude REAL NOT NULL,
+                        longitude REAL NOT NULL,
+                        status TEXT NOT NULL
+                    )
+                ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS rides (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        cab_id INTEGER NOT NULL,
+                        user_start_x REAL NOT NULL,
+                        user_start_y REAL NOT NULL,
+                        user_end_x REAL NOT NULL,
+                        user_end_y REAL NOT NULL,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        shared BOOLEAN DEFAULT 0,
+                        status TEXT DEFAULT 'on_trip',
+                        FOREIGN KEY (cab_id) REFERENCES cabs (cab_id)
+                    )
+                ''')
+
+                # Last-ride lookup on complete_ride filters by cab_id, newest first
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_rides_cab_id
+                    ON rides (cab_id, timestamp)
+                ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS users (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        username TEXT UNIQUE NOT NULL,
+                        password TEXT NOT NULL
+                    )
+                ''')
+
+                # Databases created before rides had a status column: add it,
+                # treating rides already recorded there as finished
+                cursor.execute("PRAGMA table_info(rides)")
+                if "status" not in [col[1] for col in cursor.fetchall()]:
+                    cursor.execute("ALTER TABLE rides ADD COLUMN status TEXT DEFAULT 'on_trip'")
+                    cursor.execute("UPDATE rides SET status='completed'")
+
+                # Shared-ride matching only scans rides still on trip; this
+                # index stays as small as the set of active rides
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_rides_on_trip
+                    ON rides (cab_id) WHERE status = 'on_trip'
+                ''')
+
+                conn.commit()
+                return True
+
+            except sqlite3.Error as e:
+                print("Database initialization error:", e)
 
-        cursor = conn.cursor()
+    # ----------------------------------------------------
+    # GET ALL CABS
+    # ----------------------------------------------------
+    def get_all_cabs(self):
+        with self.connection() as conn:
+            if not conn:
+                return []
 
-        try:
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS cabs (
-                    cab_id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    rto_number TEXT NOT NULL,
-                    driver_name TEXT NOT NULL,
-                    latitude REAL NOT NULL,
-                    longitude REAL NOT NULL,
-                    status TEXT NOT NULL
-                )
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS rides (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    cab_id INTEGER NOT NULL,
-                    user_start_x REAL NOT NULL,
-                    user_start_y REAL NOT NULL,
-                    user_end_x REAL NOT NULL,
-                    user_end_y REAL NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    shared BOOLEAN DEFAULT 0,
-                    status TEXT DEFAULT 'on_trip',
-                    FOREIGN KEY (cab_id) REFERENCES cabs (cab_id)
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "SELECT cab_id, name, rto_number, driver_name, latitude, longitude, status FROM cabs"
                 )
-            ''')
+                result = cursor.fetchall()
+
+                return [{
+                    "cab_id": r[0],
+                    "name": r[1],
+                    "rto_number": r[2],
+                    "driver_name": r[3],
+                    "latitude": r[4],
+                    "longitude": r[5],
+                    "status": r[6]
+                } for r in result]
+
+            except sqlite3.Error as e:
+                print("Error fetching cabs:", e)
+                return []
+
+    # ----------------------------------------------------
+    # GET CAB BY ID
+    # ----------------------------------------------------
+    def get_cab_by_id(self, cab_id):
+        with self.connection() as conn:
+            if not conn:
+                return None
 
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "SELECT cab_id, name, rto_number, driver_name, latitude, longitude, status FROM cabs WHERE cab_id=? LIMIT 1",
+                    (cab_id,)
                 )
-            ''')
+                r = cursor.fetchone()
+                if not r:
+                    return None
 
-            conn.commit()
-            return True
+                return {
+                    "cab_id": r[0],
+                    "name": r[1],
+                    "rto_number": r[2],
+                    "driver_name": r[3],
+                    "latitude": r[4],
+                    "longitude": r[5],
+                    "status": r[6]
+                }
 
-        except sqlite3.Error as e:
-            print("Database initialization error:", e)
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                print("Error fetching cab:", e)
+                return None
 
     # ----------------------------------------------------
-    # GET ALL CABS
+    # ADD / REPLACE CAB
     # ----------------------------------------------------
-    def get_all_cabs(self):
-        conn = self.connect()
-        if not conn:
-            return []
+    def add_cab(self, cab_id, name, rto_number, driver_name, latitude, longitude, status='Available'):
+        with self.writer() as conn:
+            if not conn:
+                return False
 
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "SELECT cab_id, name, rto_number, driver_name, latitude, longitude, status FROM cabs"
-            )
-            result = cursor.fetchall()
-
-            return [{
-                "cab_id": r[0],
-                "name": r[1],
-                "rto_number": r[2],
-                "driver_name": r[3],
-                "latitude": r[4],
-                "longitude": r[5],
-                "status": r[6]
-            } for r in result]
+            cursor = conn.cursor()
 
-        except sqlite3.Error as e:
-            print("Error fetching cabs:", e)
-            return []
-        finally:
-            conn.close()
+            try:
+                cursor.execute(
+                    SQL_UPSERT_CAB,
+                    (cab_id, name, rto_number, driver_name, latitude, longitude, status)
+                )
+
+                conn.commit()
+                return True
+
+            except sqlite3.Error as e:
+                conn.rollback()
+                print("Error adding cab:", e)
+                return False
 
     # ----------------------------------------------------
     # UPDATE CAB LOCATION
     # ----------------------------------------------------
     def update_cab_location(self, cab_id, latitude, longitude, status=None):
-        conn = self.connect()
-        if not conn:
-            return False
+        with self.writer() as conn:
+            if not conn:
+                return False
 
-        cursor = conn.cursor()
+            cursor = conn.cursor()
 
-        try:
-            if status:
-                cursor.execute(
-                    "UPDATE cabs SET latitude=?, longitude=?, status=? WHERE cab_id=?",
-                    (latitude, longitude, status, cab_id)
-                )
-            else:
-                cursor.execute(
-                    "UPDATE cabs SET latitude=?, longitude=? WHERE cab_id=?",
-                    (latitude, longitude, cab_id)
-                )
+            try:
+                cursor.execute(SQL_UPDATE_LOC, (latitude, longitude, status or None, cab_id))
+
+                conn.commit()
+                return True
 
-            conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                print("Error updating cab location:", e)
+                return False
+
+    # ----------------------------------------------------
+    # BULK UPDATE CAB LOCATIONS (single transaction)
+    # rows: (latitude, longitude, status or None, cab_id)
+    # ----------------------------------------------------
+    def bulk_update_cab_locations(self, rows):
+        if not rows:
             return True
 
-        except sqlite3.Error as e:
-            print("Error updating cab location:", e)
-            return False
-        finally:
-            conn.close()
+        with self.writer() as conn:
+            if not conn:
+                return False
+
+            cursor = conn.cursor()
+
+            try:
+                cursor.executemany(SQL_UPDATE_LOC, rows)
+
+                conn.commit()
+                return True
+
+            except sqlite3.Error as e:
+                conn.rollback()
+                print("Error bulk updating cab locations:", e)
+                return False
 
     # ----------------------------------------------------
     # UPDATE CAB STATUS
     # ----------------------------------------------------
     def update_cab_status(self, cab_id, status, latitude=None, longitude=None):
-        conn = self.connect()
-        if not conn:
-            return False
+        with self.writer() as conn:
+            if not conn:
+                return False
 
-        cursor = conn.cursor()
+            cursor = conn.cursor()
 
-        try:
-            if latitude is not None and longitude is not None:
-                cursor.execute(
-                    "UPDATE cabs SET status=?, latitude=?, longitude=? WHERE cab_id=?",
-                    (status, latitude, longitude, cab_id)
-                )
-            else:
-                cursor.execute(
-                    "UPDATE cabs SET status=? WHERE cab_id=?",
-                    (status, cab_id)
-                )
+            try:
+                if latitude is not None and longitude is not None:
+                    cursor.execute(SQL_UPDATE_LOC, (latitude, longitude, status, cab_id))
+                else:
+                    cursor.execute(SQL_UPDATE_STATUS, (status, cab_id))
 
-            conn.commit()
-            return True
+                conn.commit()
+                return True
 
-        except sqlite3.Error as e:
-            print("Error updating cab status:", e)
-            return False
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                conn.rollback()
+                print("Error updating cab status:", e)
+                return False
 
     # ----------------------------------------------------
     # ADD RIDE
     # ----------------------------------------------------
     def add_ride(self, cab_id, start_lat, start_lng, end_lat, end_lng, shared, status='on_trip'):
-        conn = self.connect()
-        if not conn:
-            return False
+        with self.writer() as conn:
+            if not conn:
+                return False
 
-        cursor = conn.cursor()
+            cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                INSERT INTO rides (cab_id, user_start_x, user_start_y,
-                                   user_end_x, user_end_y, shared, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (cab_id, start_lat, start_lng, end_lat, end_lng, shared, status))
+            try:
+                cursor.execute(
+                    SQL_INSERT_RIDE,
+                    (cab_id, start_lat, start_lng, end_lat, end_lng, shared, status)
+                )
 
-            conn.commit()
-            return True
+                conn.commit()
+                return True
 
-        except sqlite3.Error as e:
-            print("Error adding ride:", e)
-            return False
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                conn.rollback()
+                print("Error adding ride:", e)
+                return False
+
+    # ----------------------------------------------------
+    # COMPLETE RIDES OF CAB
+    # ----------------------------------------------------
+    def complete_rides(self, cab_id):
+        with self.writer() as conn:
+            if not conn:
+                return False
+
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute(
+                    "UPDATE rides SET status='completed' WHERE cab_id=? AND status='on_trip'",
+                    (cab_id,)
+                )
+
+                conn.commit()
+                return True
+
+            except sqlite3.Error as e:
+                conn.rollback()
+                print("Error completing rides:", e)
+                return False
 
     # ----------------------------------------------------
     # GET ACTIVE RIDES
     # ----------------------------------------------------
     def get_active_rides(self):
-        conn = self.connect()
-        if not conn:
-            return []
-
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT id, cab_id, user_start_x, user_start_y, user_end_x, user_end_y, shared FROM rides WHERE status = 'on_trip'")
-            result = cursor.fetchall()
-            return [{
-                "ride_id": r[0],
-                "cab_id": r[1],
-                "start_latitude": r[2],
-                "start_longitude": r[3],
-                "end_latitude": r[4],
-                "end_longitude": r[5],
-                "shared": bool(r[6])
-            } for r in result]
-        except sqlite3.Error as e:
-            print("Error fetching active rides:", e)
-            return []
-        finally:
-            conn.close()
+        with self.connection() as conn:
+            if not conn:
+                return []
+
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT id, cab_id, user_start_x, user_start_y, user_end_x, user_end_y, shared FROM rides WHERE status = 'on_trip'")
+                result = cursor.fetchall()
+                return [{
+                    "ride_id": r[0],
+                    "cab_id": r[1],
+                    "start_latitude": r[2],
+                    "start_longitude": r[3],
+                    "end_latitude": r[4],
+                    "end_longitude": r[5],
+                    "shared": bool(r[6])
+                } for r in result]
+            except sqlite3.Error as e:
+                print("Error fetching active rides:", e)
+                return []
 
     # ----------------------------------------------------
     # GET LAST RIDE OF CAB
     # ----------------------------------------------------
     def get_ride_by_cab_id(self, cab_id):
-        conn = self.connect()
-        if not conn:
-            return None
-
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute("""
-                SELECT id, cab_id, user_start_x, user_start_y,
-                       user_end_x, user_end_y, timestamp, shared
-                FROM rides
-                WHERE cab_id=?
-                ORDER BY timestamp DESC
-                LIMIT 1
-            """, (cab_id,))
-
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "id": row[0],
-                    "cab_id": row[1],
-                    "start_latitude": row[2],
-                    "start_longitude": row[3],
-                    "end_latitude": row[4],
-                    "end_longitude": row[5],
-                    "timestamp": row[6],
-                    "shared": bool(row[7])
-                }
-
-            return None
-
-        except sqlite3.Error as e:
-            print("Error fetching ride:", e)
-            return None
-        finally:
-            conn.close()
+        with self.connection() as conn:
+            if not conn:
+                return None
+
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute("""
+                    SELECT id, cab_id, user_start_x, user_start_y,
+                           user_end_x, user_end_y, timestamp, shared
+                    FROM rides
+                    WHERE cab_id=?
+                    ORDER BY timestamp DESC
+                    LIMIT 1
+                """, (cab_id,))
+
+                row = cursor.fetchone()
+                if row:
+                    return {
+                        "id": row[0],
+                        "cab_id": row[1],
+                        "start_latitude": row[2],
+                        "start_longitude": row[3],
+                        "end_latitude": row[4],
+                        "end_longitude": row[5],
+                        "timestamp": row[6],
+                        "shared": bool(row[7])
+                    }
+
+                return None
+
+            except sqlite3.Error as e:
+                print("Error fetching ride:", e)
+                return None
@@ -0,0 +1,290 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from dsa.kernels import advance
+from dsa.utils import calculate_distance_vec
+
+# Movement phase of a cab
+PHASE_IDLE = 0
+PHASE_PICKUP = 1
+
+
+class FleetState:
+    """
+    In-memory live state of every cab, stored as a Structure of Arrays so
+    the simulator can move the whole fleet with a handful of NumPy calls.
+    The database remains the durable copy: every mutation is written
+    through to it, but reads never touch SQLite after startup.
+
+    No lock is needed: the app runs on a single gevent thread and none of
+    these methods yield to another greenlet while the arrays are being
+    read or mutated.
+    """
+    def __init__(self, db):
+        self.db = db
+        # Bumped on every change visible through all_cabs(), so callers can
+        # tell whether a snapshot they built earlier is still current
+        self.version = 0
+        self.reload()
+
+    def reload(self):
+        """
+        Rebuild the arrays from the database.
+        """
+        cabs = self.db.get_all_cabs()
+
+        self.cab_ids = [cab['cab_id'] for cab in cabs]
+        self.row_of = {cab_id: row for row, cab_id in enumerate(self.cab_ids)}
+        self.details = [{
+            "name": cab['name'],
+            "rto_number": cab['rto_number'],
+            "driver_name": cab['driver_name']
+        } for cab in cabs]
+
+        n = len(cabs)
+        self.lat = np.array([cab['latitude'] for cab in cabs], dtype=np.float64)
+        self.lng = np.array([cab['longitude'] for cab in cabs], dtype=np.float64)
+        self.status = np.array([cab['status'] for cab in cabs], dtype=object)
+        self.target_lat = np.zeros(n, dtype=np.float64)
+        self.target_lng = np.zeros(n, dtype=np.float64)
+        self.phase = np.full(n, PHASE_IDLE, dtype=np.int8)
+        self.unsaved = np.zeros(n, dtype=bool)      # moved since the last flush
+        self.active_rows = set()                    # rows with phase != PHASE_IDLE
+        self.version += 1
+
+        # KD-tree over Available cabs, rebuilt lazily once a change touches
+        # an Available cab (moves of Busy cabs leave it valid)
+        self._tree = None
+        self._tree_rows = None
+        self._tree_coslat = 1.0
+        self._tree_dirty = True
+
+    def _cab(self, row):
+        """
+        Build the public dictionary for one row.
+        """
+        cab = {"cab_id": self.cab_ids[row]}
+        cab.update(self.details[row])
+        cab["latitude"] = float(self.lat[row])
+        cab["longitude"] = float(self.lng[row])
+        cab["status"] = self.status[row]
+        return cab
+
+    def all_cabs(self):
+        """
+        Get a list of all cabs as dictionaries.
+        """
+        # tolist() converts whole columns to Python floats in one C call
+        cabs = []
+        for cab_id, details, lat, lng, status in zip(
+            self.cab_ids, self.details, self.lat.tolist(), self.lng.tolist(), self.status.tolist()
+        ):
+            cab = {"cab_id": cab_id}
+            cab.update(details)
+            cab["latitude"] = lat
+            cab["longitude"] = lng
+            cab["status"] = status
+            cabs.append(cab)
+        return cabs
+
+    def get(self, cab_id):
+        """
+        Get a single cab by id, or None if it is unknown.
+        Cabs written to the database by another process are picked up here.
+        """
+        row = self.row_of.get(cab_id)
+        if row is None:
+            cab = self.db.get_cab_by_id(cab_id)
+            if not cab:
+                return None
+            row = self._put(**cab)
+        return self._cab(row)
+
+    def positions(self, rows=None):
+        """
+        Get (cab_id, latitude, longitude, status) dictionaries for broadcasting.
+        """
+        if rows is None:
+            rows = np.arange(len(self.cab_ids))
+        return [{
+            "cab_id": self.cab_ids[row],
+            "latitude": lat,
+            "longitude": lng,
+            "status": status
+        } for row, lat, lng, status in zip(
+            rows.tolist(), self.lat[rows].tolist(), self.lng[rows].tolist(), self.status[rows].tolist()
+        )]
+
+    def add_cab(self, cab_id, name, rto_number, driver_name, latitude, longitude, status='Available'):
+        """
+        Register a new cab or replace an existing one.
+        """
+        if not self.db.add_cab(cab_id, name, rto_number, driver_name, latitude, longitude, status):
+            return False
+
+        self._put(cab_id, name, rto_number, driver_name, latitude, longitude, status)
+        return True
+
+    def _put(self, cab_id, name, rto_number, driver_name, latitude, longitude, status):
+        """
+        Insert or overwrite one cab in the arrays and return its row.
+        """
+        details = {"name": name, "rto_number": rto_number, "driver_name": driver_name}
+        row = self.row_of.get(cab_id)
+
+        if row is None:
+            indexed = status == "Available"
+            self.row_of[cab_id] = len(self.cab_ids)
+            self.cab_ids.append(cab_id)
+            self.details.append(details)
+            self.lat = np.append(self.lat, float(latitude))
+            self.lng = np.append(self.lng, float(longitude))
+            self.status = np.append(self.status, np.array([status], dtype=object))
+            self.target_lat = np.append(self.target_lat, 0.0)
+            self.target_lng = np.append(self.target_lng, 0.0)
+            self.phase = np.append(self.phase, np.int8(PHASE_IDLE))
+            self.unsaved = np.append(self.unsaved, False)
+        else:
+            indexed = "Available" in (self.status[row], status)
+            self.details[row] = details
+            self.lat[row] = latitude
+            self.lng[row] = longitude
+            self.status[row] = status
+        if indexed:
+            self._tree_dirty = True
+        self.version += 1
+        return self.row_of[cab_id]
+
+    def update_status(self, cab_id, status):
+        """
+        Change a cab's status.
+        """
+        row = self.row_of.get(cab_id)
+        if row is not None:
+            if (self.status[row] == "Available") != (status == "Available"):
+                self._tree_dirty = True
+            self.status[row] = status
+            self.version += 1
+        return self.db.update_cab_status(cab_id, status)
+
+    def update_location(self, cab_id, latitude, longitude, status=None):
+        """
+        Move a cab, optionally changing its status at the same time.
+        """
+        row = self.row_of.get(cab_id)
+        if row is not None:
+            if "Available" in (self.status[row], status):
+                self._tree_dirty = True
+            self.lat[row] = latitude
+            self.lng[row] = longitude
+            if status:
+                self.status[row] = status
+            self.unsaved[row] = False
+            self.version += 1
+        return self.db.update_cab_location(cab_id, latitude, longitude, status)
+
+    def set_target(self, cab_id, latitude, longitude):
+        """
+        Send a cab towards a pickup point.
+        """
+        row = self.row_of.get(cab_id)
+        if row is None:
+            return False
+        self.target_lat[row] = latitude
+        self.target_lng[row] = longitude
+        self.phase[row] = PHASE_PICKUP
+        self.active_rows.add(row)
+        return True
+
+    def clear_target(self, cab_id):
+        """
+        Stop moving a cab towards its target.
+        """
+        row = self.row_of.get(cab_id)
+        if row is not None:
+            self.phase[row] = PHASE_IDLE
+            self.active_rows.discard(row)
+
+    def has_targets(self):
+        """
+        Check whether any cab is currently moving towards a target.
+        """
+        return bool(self.active_rows)
+
+    def step_towards_targets(self, step, arrive_threshold):
+        """
+        Move every cab that has a target one fixed step towards it.
+        Cabs within arrive_threshold of their target are marked Arrived and
+        their target is cleared. Only the active rows are touched, so a tick
+        costs O(cabs en route) rather than O(fleet).
+
+        Returns:
+            A tuple (moved_rows, arrived_rows) of row index arrays.
+        """
+        rows = np.fromiter(self.active_rows, dtype=np.intp, count=len(self.active_rows))
+        rows.sort()
+
+        if np.any(self.status[rows] == "Available"):
+            self._tree_dirty = True
+
+        arrived = advance(self.lat, self.lng, self.target_lat, self.target_lng,
+                          rows, step, arrive_threshold)
+
+        moved_rows, arrived_rows = rows[~arrived], rows[arrived]
+        self.status[arrived_rows] = "Arrived"
+        self.phase[arrived_rows] = PHASE_IDLE
+        self.unsaved[rows] = True
+        self.active_rows.difference_update(arrived_rows.tolist())
+        if len(rows):
+            self.version += 1
+
+        return moved_rows, arrived_rows
+
+    def nearest_available(self, latitude, longitude, k=3):
+        """
+        Find the k nearest Available cabs with a KD-tree query.
+        The tree works on an equirectangular projection (longitude scaled by
+        cos of the fleet's mean latitude), which is close to metric at city
+        scale, so its ranking matches great-circle distance.
+
+        Returns:
+            A list of (cab, distance_km) tuples, nearest first.
+        """
+        if self._tree_dirty:
+            self._tree_rows = np.flatnonzero(self.status == "Available")
+            lat = self.lat[self._tree_rows]
+            if len(lat):
+                self._tree_coslat = np.cos(np.radians(lat.mean()))
+            self._tree = cKDTree(np.column_stack((lat, self.lng[self._tree_rows] * self._tree_coslat)))
+            self._tree_dirty = False
+
+        k = min(k, len(self._tree_rows))
+        if k <= 0:
+            return []
+
+        _, idx = self._tree.query([latitude, longitude * self._tree_coslat], k=range(1, k + 1))
+        rows = self._tree_rows[idx]
+        distances = calculate_distance_vec(latitude, longitude, self.lat[rows], self.lng[rows])
+
+        # The tree ranks by degrees; re-rank the k candidates by true distance
+        order = np.argsort(distances)
+        rows, distances = rows[order], distances[order]
+
+        return [(self._cab(row), float(d)) for row, d in zip(rows, distances)]
+
+    def flush(self):
+        """
+        Write the position and status of every cab changed by the simulator
+        since the last flush, in one transaction.
+        """
+        rows = np.flatnonzero(self.unsaved)
+        if not len(rows):
+            return True
+
+        saved = self.db.bulk_update_cab_locations([
+            (float(self.lat[row]), float(self.lng[row]), self.status[row], self.cab_ids[row])
+            for row in rows
+        ])
+        if saved:
+            self.unsaved[rows] = False
+        return saved
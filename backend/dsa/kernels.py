@@ -0,0 +1,58 @@
+import math
+import numpy as np
+from numba import njit, vectorize
+
+
+@njit(cache=True, fastmath=True)
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Compiled Haversine distance in kilometers between two points.
+    """
+    R = 6371.0  # Radius of Earth in kilometers
+
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = math.radians(lon2) - math.radians(lon1)
+
+    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
+    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+@vectorize(["float64(float64, float64, float64, float64)"], cache=True, fastmath=True)
+def haversine_ufunc(lat1, lon1, lat2, lon2):
+    """
+    haversine() as a NumPy ufunc, so both ends may be arrays and broadcast
+    against each other (one-to-many, pairwise rows, ...).
+    """
+    return haversine(lat1, lon1, lat2, lon2)
+
+
+@njit(cache=True, fastmath=True)
+def advance(lat, lng, target_lat, target_lng, rows, step, arrive_threshold):
+    """
+    Compiled simulator step: move each of the given rows one fixed step
+    towards its target, in place. Rows already within arrive_threshold are
+    left where they are and flagged in the returned boolean array.
+    """
+    n = rows.shape[0]
+    arrived = np.empty(n, dtype=np.bool_)
+    for i in range(n):
+        row = rows[i]
+        dlat = target_lat[row] - lat[row]
+        dlng = target_lng[row] - lng[row]
+        dist = math.sqrt(dlat * dlat + dlng * dlng)
+
+        if dist < arrive_threshold:
+            arrived[i] = True
+        else:
+            arrived[i] = False
+            scale = step / dist
+            lat[row] += dlat * scale
+            lng[row] += dlng * scale
+    return arrived
+
+
+# Trigger compilation at import so the first request doesn't pay for it
+haversine(0.0, 0.0, 0.0, 0.0)
+advance(np.zeros(1), np.zeros(1), np.zeros(1), np.zeros(1), np.zeros(1, dtype=np.intp), 0.0, 1.0)
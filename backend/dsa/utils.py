@@ -1,25 +1,29 @@
-import math
+import numpy as np
+
+from dsa.kernels import haversine, haversine_ufunc
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
     Calculate the distance between two points on Earth using the Haversine formula.
-    The distance is in kilometers.
+    The distance is in kilometers. If any argument is an array the call is
+    handed to calculate_distance_vec and an array is returned.
     """
-    R = 6371  # Radius of Earth in kilometers
-
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
-
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
+    # Plain floats are by far the common case; test for them exactly, since
+    # anything broader costs as much as the distance itself
+    if type(lat1) is float and type(lon1) is float and type(lat2) is float and type(lon2) is float:
+        return haversine(lat1, lon1, lat2, lon2)
+    if np.ndim(lat1) or np.ndim(lon1) or np.ndim(lat2) or np.ndim(lon2):
+        return calculate_distance_vec(lat1, lon1, lat2, lon2)
+    return haversine(float(lat1), float(lon1), float(lat2), float(lon2))
 
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    distance = R * c
-    return distance
+def calculate_distance_vec(lat1, lon1, lat2, lon2):
+    """
+    Vectorized Haversine distance in kilometers. Arguments may be scalars or
+    arrays and are broadcast against each other (e.g. one point to many);
+    if any is an array the result is an array of the broadcast shape, even
+    when it has one element.
+    """
+    return haversine_ufunc(lat1, lon1, lat2, lon2)
 
 def calculate_fare(distance):
     """
@@ -41,6 +45,17 @@ def is_point_on_segment(px, py, ax, ay, bx, by, tolerance=0.001):
     # Check if the sum of distances AP and PB is approximately equal to AB
     return abs(dist_ap + dist_pb - dist_ab) < tolerance
 
+def is_point_on_segments(px, py, ax, ay, bx, by, tolerance=0.001):
+    """
+    Array form of is_point_on_segment: check one point P(px, py) against
+    many segments A[i]B[i] at once and return a boolean array.
+    """
+    dist_ab = calculate_distance_vec(ax, ay, bx, by)
+    dist_ap = calculate_distance_vec(ax, ay, px, py)
+    dist_pb = calculate_distance_vec(px, py, bx, by)
+
+    return np.atleast_1d(np.abs(dist_ap + dist_pb - dist_ab) < tolerance)
+
 def is_point_on_path(px, py, path, tolerance=0.001):
     """
     Check if point P(px, py) is on any segment of a given path.
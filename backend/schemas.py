@@ -0,0 +1,43 @@
+from typing import Optional
+
+import msgspec
+
+
+# -----------------------------------------------------------------------------
+# REQUEST BODIES
+# Decoded straight from the raw JSON bytes: parsing, required-field checks
+# and float/int coercion all happen in one C-level pass.
+# -----------------------------------------------------------------------------
+class CabRegisterRequest(msgspec.Struct):
+    cab_id: int
+    name: str
+    rto_number: str
+    driver_name: str
+    latitude: float
+    longitude: float
+    status: str = "Available"
+
+
+class FindCabRequest(msgspec.Struct):
+    start_latitude: float
+    start_longitude: float
+    end_latitude: float
+    end_longitude: float
+
+
+class BookCabRequest(msgspec.Struct):
+    cab_id: int
+    start_latitude: float
+    start_longitude: float
+    end_latitude: float
+    end_longitude: float
+    is_shared: bool = False
+    original_ride_id: Optional[int] = None
+
+
+# -----------------------------------------------------------------------------
+# WEBSOCKET MESSAGES
+# -----------------------------------------------------------------------------
+class ViewportMessage(msgspec.Struct):
+    # min_lat, min_lng, max_lat, max_lng; null clears the viewport
+    bbox: tuple[float, float, float, float] | None
@@ -0,0 +1,89 @@
+import math
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from dsa.db_utils import DatabaseUtils
+from dsa.fleet_state import FleetState
+from dsa.utils import calculate_distance
+
+
+class NearestAvailableTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseUtils(os.path.join(self._tmp.name, "database.db"))
+        self.fleet = FleetState(self.db)
+
+    def tearDown(self):
+        self.db.disconnect()
+        self._tmp.cleanup()
+
+    def add(self, cab_id, latitude, longitude, status="Available"):
+        self.assertTrue(self.fleet.add_cab(cab_id, "Cab", "MH12", "Driver", latitude, longitude, status))
+
+    def nearest_ids(self, latitude, longitude, k=3):
+        return [cab["cab_id"] for cab, _ in self.fleet.nearest_available(latitude, longitude, k=k)]
+
+    def test_status_cycle_updates_results(self):
+        self.add(1, 19.000, 72.800)
+        self.add(2, 19.010, 72.810)
+        self.add(3, 19.020, 72.820)
+        self.assertEqual(self.nearest_ids(19.0, 72.8), [1, 2, 3])
+
+        self.fleet.update_status(1, "Busy")
+        self.assertEqual(self.nearest_ids(19.0, 72.8), [2, 3])
+
+        self.fleet.update_status(1, "Available")
+        self.assertEqual(self.nearest_ids(19.0, 72.8), [1, 2, 3])
+
+    def test_busy_cab_tick_keeps_tree(self):
+        self.add(1, 19.000, 72.800, status="Busy")
+        self.add(2, 19.010, 72.810)
+        self.add(3, 19.020, 72.820)
+        self.assertEqual(self.nearest_ids(19.0, 72.8), [2, 3])
+        tree = self.fleet._tree
+
+        self.fleet.set_target(1, 19.05, 72.85)
+        moved, arrived = self.fleet.step_towards_targets(0.0002, 0.00025)
+
+        self.assertEqual(moved.tolist(), [self.fleet.row_of[1]])
+        self.assertFalse(self.fleet._tree_dirty)
+        self.assertEqual(self.nearest_ids(19.0, 72.8), [2, 3])
+        self.assertIs(self.fleet._tree, tree)
+
+    def test_k_larger_than_available(self):
+        self.add(1, 19.000, 72.800)
+        self.add(2, 19.010, 72.810, status="Busy")
+        self.assertEqual(self.nearest_ids(19.0, 72.8, k=5), [1])
+
+        self.fleet.update_status(1, "Busy")
+        self.assertEqual(self.nearest_ids(19.0, 72.8, k=5), [])
+
+    def test_ranking_matches_haversine(self):
+        # The tree works on an equirectangular projection; the returned
+        # order and distances must still match great-circle distance
+        rng = random.Random(7)
+        for cab_id in range(1, 201):
+            self.add(cab_id, rng.uniform(18.9, 19.3), rng.uniform(72.7, 73.1))
+
+        for _ in range(50):
+            lat, lng = rng.uniform(18.9, 19.3), rng.uniform(72.7, 73.1)
+            expected = sorted(
+                (calculate_distance(lat, lng, cab["latitude"], cab["longitude"]), cab["cab_id"])
+                for cab in self.fleet.all_cabs()
+            )[:3]
+            got = [(d, cab["cab_id"]) for cab, d in self.fleet.nearest_available(lat, lng, k=3)]
+
+            self.assertEqual([cab_id for _, cab_id in got], [cab_id for _, cab_id in expected])
+            for (d, _), (e, _) in zip(got, expected):
+                self.assertTrue(math.isclose(d, e, rel_tol=1e-9))
+
+
+if __name__ == "__main__":
+    unittest.main()
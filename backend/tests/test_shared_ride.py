@@ -0,0 +1,58 @@
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FindSharedRideTest(unittest.TestCase):
+    def setUp(self):
+        # Fresh database in a temp dir, no simulator greenlet
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env = mock.patch.dict(os.environ, {"CAB_SIM_MASTER": "0"})
+        self._env.start()
+        if BACKEND not in sys.path:
+            sys.path.insert(0, BACKEND)
+        sys.modules.pop("app", None)
+        self.app = importlib.import_module("app")
+        self.client = self.app.app.test_client()
+
+    def tearDown(self):
+        self.app.db.disconnect()
+        sys.modules.pop("app", None)
+        self._env.stop()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_find_cab_with_single_active_ride(self):
+        # One ride in progress and a new rider along its route
+        for cab_id, lat, lng in ((1, 18.5, 73.8), (2, 18.45, 73.75)):
+            r = self.client.post("/api/cab_register", json={
+                "cab_id": cab_id, "name": "Cab", "rto_number": "MH12", "driver_name": "Driver",
+                "latitude": lat, "longitude": lng
+            })
+            self.assertEqual(r.status_code, 201)
+
+        r = self.client.post("/api/book_cab", json={
+            "cab_id": 1, "start_latitude": 18.5, "start_longitude": 73.8,
+            "end_latitude": 18.6, "end_longitude": 73.9
+        })
+        self.assertEqual(r.status_code, 200)
+
+        r = self.client.post("/api/find_cab", json={
+            "start_latitude": 18.52, "start_longitude": 73.82,
+            "end_latitude": 18.55, "end_longitude": 73.85
+        })
+        self.assertEqual(r.status_code, 200)
+
+        shared = [c for c in r.get_json()["available_cabs"] if c["is_shared"]]
+        self.assertEqual([c["cab"]["cab_id"] for c in shared], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
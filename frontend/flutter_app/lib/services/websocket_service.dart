@@ -25,8 +25,17 @@ class WebSocketService {
 
       _channel!.stream.listen(
         (event) {
-          final decoded = json.decode(event);
-          for (var cb in _listeners) cb(decoded);
+          // Server sends UTF-8 JSON in binary frames
+          final text = event is String ? event : utf8.decode(event as List<int>);
+          final decoded = json.decode(text);
+          // Simulator ticks arrive as one batch frame; fan out per cab
+          if (decoded['type'] == 'batch') {
+            for (final update in decoded['updates']) {
+              _dispatch(Map<String, dynamic>.from(update));
+            }
+          } else {
+            _dispatch(decoded);
+          }
         },
         onDone: () {
           print("🔴 WS closed");
@@ -45,6 +54,10 @@ class WebSocketService {
     _isConnecting = false;
   }
 
+  void _dispatch(Map<String, dynamic> msg) {
+    for (var cb in _listeners) cb(msg);
+  }
+
   void _reconnect() {
     Future.delayed(const Duration(seconds: 2), connect);
   }